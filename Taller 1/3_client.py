@@ -1,7 +1,15 @@
+import queue
 import socket
+import sys
+import threading
+import time
 import cv2
 import numpy as np
 
+import stream_protocol
+
+STATS_INTERVAL = 1.0  # segundos entre reportes STATS al servidor
+
 def recvall(sock, n):
     """Recibe exactamente n bytes o devuelve None si falla."""
     data = b''
@@ -12,36 +20,153 @@ def recvall(sock, n):
         data += packet
     return data
 
+class StreamStats:
+    """Latencia extremo a extremo y pérdidas (huecos en seq) de la ventana actual."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.received = 0
+        self.lost = 0
+        self.last_seq = None
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.window_frames = 0
+        self.window_start = time.monotonic()
+
+    def on_frame(self, header):
+        latency_ms = max(stream_protocol.now_us() - header.send_us, 0) / 1000
+        with self.lock:
+            if self.last_seq is not None and header.seq > self.last_seq + 1:
+                self.lost += header.seq - self.last_seq - 1
+            self.last_seq = header.seq
+            self.received += 1
+            self.window_frames += 1
+            self.latency_sum += latency_ms
+            self.latency_max = max(self.latency_max, latency_ms)
+
+    def report(self):
+        """Devuelve el reporte de la ventana y empieza una nueva."""
+        with self.lock:
+            now = time.monotonic()
+            n = self.window_frames
+            report = {
+                "received": self.received,
+                "lost": self.lost,
+                "latency_ms": round(self.latency_sum / n, 2) if n else None,
+                "latency_max_ms": round(self.latency_max, 2),
+                "fps": round(n / (now - self.window_start), 2),
+            }
+            self.window_frames = 0
+            self.latency_sum = 0.0
+            self.latency_max = 0.0
+            self.window_start = now
+            return report
+
+def receiver_loop(client, frames, stats):
+    """Lee cabecera + JPEG del socket y deja el frame más reciente en la cola."""
+    try:
+        while True:
+            header_data = recvall(client, stream_protocol.HEADER.size)
+            if not header_data:
+                break
+            header = stream_protocol.unpack_header(header_data)
+            if header.kind == stream_protocol.KIND_END:
+                print("Fin del stream.")
+                break
+
+            image_data = recvall(client, header.length)
+            if image_data is None:
+                break
+            stats.on_frame(header)
+
+            # Si la pantalla va atrasada se descarta el frame viejo
+            try:
+                frames.put_nowait((header, image_data))
+            except queue.Full:
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    pass
+                frames.put_nowait((header, image_data))
+    except (OSError, ValueError) as e:
+        print(f"Error de recepción: {e}")
+    finally:
+        frames.put(None)
+
 def main():
-    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Uso: python 3_client.py [ip] [video] [segundo_inicial]
+    server_ip = sys.argv[1] if len(sys.argv) >= 2 else '192.168.80.13'
+    request = {"loop": True}
+    if len(sys.argv) >= 3:
+        request["video"] = sys.argv[2]
+    if len(sys.argv) >= 4:
+        request["start_time"] = float(sys.argv[3])
 
-    server_ip = ""
-    client.connect(('192.168.80.13', 5000))
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    client.connect((server_ip, 5000))
 
     print("Connected to the server.")
+    print("Teclas: espacio=pausa, a/d=-/+5 s, -/+=calidad, [/]=fps, q=salir")
+    client.sendall(stream_protocol.encode_control(stream_protocol.PLAY, **request))
+
+    frames = queue.Queue(maxsize=1)
+    stats = StreamStats()
+    threading.Thread(target=receiver_loop, args=(client, frames, stats), daemon=True).start()
+
+    paused = False
+    pts = 0.0
+    quality = None
+    fps = None
+    next_report = time.monotonic() + STATS_INTERVAL
+
+    try:
+        while True:
+            try:
+                item = frames.get(timeout=0.03)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
 
-    while True:
-        # Recibir el tamaño de la imagen (4 bytes)
-        size_data = recvall(client, 4)
-        if not size_data:
-            break
+            if item:
+                header, image_data = item
+                pts = header.pts_us / 1_000_000
+                quality = quality or header.quality
 
-        size = int.from_bytes(size_data, byteorder='big')
+                # Decodificar la imagen
+                frame_data = np.frombuffer(image_data, dtype=np.uint8)
+                frame = cv2.imdecode(frame_data, cv2.IMREAD_COLOR)
 
-        # Recibir la imagen completa
-        image_data = recvall(client, size)
-        if not image_data:
-            break
+                # Mostrar la imagen
+                if frame is not None:
+                    cv2.imshow('Video', frame)
 
-        # Decodificar la imagen
-        frame_data = np.frombuffer(image_data, dtype=np.uint8)
-        frame = cv2.imdecode(frame_data, cv2.IMREAD_COLOR)
+            if time.monotonic() >= next_report:
+                report = stats.report()
+                fps = fps or report["fps"]
+                client.sendall(stream_protocol.encode_control(stream_protocol.STATS, **report))
+                print(f"fps={report['fps']} latencia={report['latency_ms']} ms "
+                      f"(max {report['latency_max_ms']}) recibidos={report['received']} perdidos={report['lost']}")
+                next_report += STATS_INTERVAL
 
-        # Mostrar la imagen
-        if frame is not None:
-            cv2.imshow('Video', frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
                 break
+            elif key == ord(' '):
+                paused = not paused
+                msg = stream_protocol.PAUSE if paused else stream_protocol.RESUME
+                client.sendall(stream_protocol.encode_control(msg))
+            elif key in (ord('a'), ord('d')):
+                delta = 5.0 if key == ord('d') else -5.0
+                client.sendall(stream_protocol.encode_control(stream_protocol.SEEK, time=max(pts + delta, 0.0)))
+            elif key in (ord('-'), ord('+')) and quality:
+                quality = min(max(quality + (10 if key == ord('+') else -10), 10), 100)
+                client.sendall(stream_protocol.encode_control(stream_protocol.SET, quality=quality))
+            elif key in (ord('['), ord(']')) and fps:
+                fps = max(fps + (5 if key == ord(']') else -5), 1)
+                client.sendall(stream_protocol.encode_control(stream_protocol.SET, fps=fps))
+    except (KeyboardInterrupt, OSError):
+        pass
 
     client.close()
     cv2.destroyAllWindows()
@@ -0,0 +1,194 @@
+#Relay de video con asyncio: un solo event loop difunde el mismo stream a todos los espectadores
+import argparse
+import asyncio
+import time
+
+import stream_protocol
+from video_index import VideoCatalog
+
+FLAGS_OFFSET = 2  # posición del byte flags dentro de stream_protocol.HEADER
+
+class Viewer:
+    """
+    Un espectador conectado. Solo guarda el último paquete pendiente: si su socket
+    va lento (drain() no termina) los frames viejos se reemplazan y el hueco en seq
+    le indica la pérdida al cliente, sin frenar al resto.
+    """
+
+    def __init__(self, addr, writer):
+        self.addr = addr
+        self.writer = writer
+        self.pending = None
+        self.ready = asyncio.Event()
+        self.first = True
+        self.sent = 0
+        self.dropped = 0
+        self.ended = False
+        self.task = None
+
+    def offer(self, packet):
+        if self.pending is not None:
+            self.dropped += 1
+        if self.first:
+            # el primer frame de cada espectador es una discontinuidad para él
+            packet = bytearray(packet)
+            packet[FLAGS_OFFSET] |= stream_protocol.FLAG_DISCONTINUITY
+            self.first = False
+        self.pending = packet
+        self.ready.set()
+
+    def end(self, packet):
+        self.pending = packet
+        self.ended = True
+        self.ready.set()
+
+    async def write_loop(self):
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+                packet, self.pending = self.pending, None
+                if packet is not None:
+                    self.writer.write(packet)
+                    await self.writer.drain()
+                    self.sent += 1
+                if self.ended:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.writer.close()
+
+class Relay:
+    def __init__(self, index, fps, loop, min_viewers):
+        self.index = index
+        self.fps = min(fps, index.fps) if fps else index.fps
+        self.loop = loop
+        self.min_viewers = min_viewers
+        self.viewers = set()
+        self.enough_viewers = asyncio.Event()
+        self.finished = asyncio.Event()
+        if min_viewers <= 0:
+            self.enough_viewers.set()
+
+    async def handle_viewer(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        try:
+            req = stream_protocol.decode_control((await reader.readline()).decode("utf-8", "replace"))
+        except (ConnectionError, OSError, ValueError):  # ValueError: línea más larga que el límite
+            writer.close()
+            return
+        video = req.get("video")
+        if self.finished.is_set() or (video and video != self.index.name):
+            writer.write(stream_protocol.pack_end(0))
+            writer.close()
+            return
+
+        viewer = Viewer(addr, writer)
+        viewer.task = asyncio.create_task(viewer.write_loop())
+        self.viewers.add(viewer)
+        if len(self.viewers) >= self.min_viewers:
+            self.enough_viewers.set()
+        try:
+            # canal de control: en un relay compartido solo tienen sentido los STATS
+            while not viewer.ended:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = stream_protocol.decode_control(line.decode("utf-8", "replace"))
+                if msg.get("type") == stream_protocol.STATS and len(self.viewers) <= 8:
+                    print(f"{addr}: recibidos={msg.get('received')} perdidos={msg.get('lost')} "
+                          f"latencia={msg.get('latency_ms')} ms")
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            if not viewer.ended:
+                viewer.end(None)
+            await viewer.task
+            self.viewers.discard(viewer)
+
+    async def broadcast(self):
+        """Reloj del stream: lee cada frame del índice una vez y lo ofrece a todos."""
+        await self.enough_viewers.wait()
+        index = self.index
+        step = index.fps / self.fps
+        interval = 1.0 / self.fps
+        seq = 0
+        pos = 0.0
+        next_time = time.monotonic()
+        flags = stream_protocol.FLAG_KEYFRAME | stream_protocol.FLAG_DISCONTINUITY
+        while True:
+            if int(pos) >= len(index):
+                if not self.loop:
+                    break
+                pos = 0.0
+                flags |= stream_protocol.FLAG_DISCONTINUITY
+            frame = int(pos)
+            packet = stream_protocol.pack_frame(seq, int(frame * 1_000_000 / index.fps), index.frame(frame),
+                                                index.quality, index.width, index.height, flags)
+            for viewer in self.viewers:
+                viewer.offer(packet)
+            flags = stream_protocol.FLAG_KEYFRAME
+            seq += 1
+            pos += step
+
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                skipped = int(-delay / interval)
+                seq += skipped
+                pos += skipped * step
+                next_time = time.monotonic()
+                await asyncio.sleep(0)
+
+        self.finished.set()
+        end = stream_protocol.pack_end(seq)
+        for viewer in list(self.viewers):
+            viewer.end(end)
+        print(f"Stream terminado ({seq} frames). Cerrando {len(self.viewers)} espectadores...")
+
+async def serve(args):
+    catalog = VideoCatalog(args.dir)
+    name = args.video or (catalog.names() or [""])[0]
+    index = catalog.get(name)
+    if index is None:
+        print(f"Video no encontrado: '{name}'")
+        return
+
+    relay = Relay(index, args.fps, args.loop, args.min_viewers)
+    server = await asyncio.start_server(relay.handle_viewer, "0.0.0.0", args.port)
+    print(f"Relay de '{name}' en el puerto {args.port}")
+    try:
+        await relay.broadcast()
+        server.close()  # no se aceptan más espectadores
+        tasks = [v.task for v in relay.viewers if v.task is not None]
+        if tasks:
+            # se deja a cada espectador terminar de recibir el fin de stream
+            done, stuck = await asyncio.wait(tasks, timeout=5)
+            for viewer in relay.viewers:
+                if viewer.task in stuck:
+                    viewer.writer.transport.abort()
+            if stuck:
+                print(f"{len(stuck)} espectadores no terminaron a tiempo; conexiones abortadas.")
+                await asyncio.wait(stuck)
+    finally:
+        catalog.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Relay de video con asyncio (un stream compartido)")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--dir", default=".", help="directorio con los videos")
+    parser.add_argument("--video", default=None, help="video a difundir (por defecto el primero)")
+    parser.add_argument("--fps", type=float, default=None)
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--min-viewers", type=int, default=0, help="esperar a N espectadores antes de empezar")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
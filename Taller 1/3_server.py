@@ -1,82 +1,252 @@
+import argparse
+import math
 import socket
 import threading
 import cv2
 import numpy as np
 import time
 
-current_frame = None  # variable compartida
-video_finished = False  # bandera de fin de video
-
-def handle_client(client_socket, videoCapture, frame_interval):
-    global current_frame, video_finished
-    while True:
-        try:
-            ret, frame = videoCapture.read()
-            if not ret:
-                print("Video terminado.")
-                video_finished = True
-                break
-
-            # Guardar frame para mostrar en el servidor
-            current_frame = frame.copy()
-
-            _, buffer = cv2.imencode('.jpg', frame)
-            data = buffer.tobytes()
-            
-            # Enviar tamaño + frame
-            client_socket.sendall(len(data).to_bytes(4, byteorder='big'))
-            client_socket.sendall(data)
-
-            # Respetar FPS
-            time.sleep(frame_interval)
-
-        except Exception as e:
-            print(f"Client Disconnected: {e}")
-            client_socket.close()
-            break
-
-def show():
-    global current_frame, video_finished
-    while True:
-        if video_finished:
-            break  # salimos cuando acaba el video
-
-        if current_frame is not None:
-            cv2.imshow('Frame', current_frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+import stream_protocol
+from encoder import EncodePool
+from preview import LatestFrameSlot, Preview
+from video_index import VideoCatalog
+
+preview_slot = LatestFrameSlot()  # último JPEG enviado, solo si hay vista previa
+server_running = True
+
+def recv_line(sock, limit=4096):
+    """Lee una línea terminada en '\\n'. Devuelve None si se cierra la conexión."""
+    buf = b''
+    while not buf.endswith(b'\n'):
+        ch = sock.recv(1)
+        if not ch:
+            return None
+        buf += ch
+        if len(buf) > limit:
+            return None
+    return buf.decode('utf-8', 'replace').strip()
+
+def to_number(value, cast=float):
+    """Valor numérico de un mensaje de control, o None si falta o no es un número finito."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return cast(number) if math.isfinite(number) else None
+
+class Session:
+    """Estado de reproducción de un cliente; lo modifican los mensajes de control."""
+
+    def __init__(self, index, req):
+        self.index = index
+        self.cond = threading.Condition()
+        self.closed = False
+        self.paused = False
+        self.loop = bool(req.get("loop", False))
+        self.fps = index.fps
+        self.quality = index.quality
+        self.pos = 0.0
+        self.discontinuity = True
+        self.last_stats = None
+        self.set_params(req)
+        self.seek(req.get("start_frame"), req.get("start_time"))
+
+    # Los valores mal formados se ignoran: un mensaje malo no debe cortar el stream
+    def set_params(self, msg):
+        fps = to_number(msg.get("fps"))
+        if fps:
+            self.fps = min(max(fps, 1.0), self.index.fps)
+        quality = to_number(msg.get("quality"), int)
+        if quality:
+            self.quality = min(max(quality, 10), 100)
+
+    def seek(self, frame=None, seconds=None):
+        seconds = to_number(seconds)
+        frame = to_number(frame, int)
+        if seconds is not None:
+            seconds = min(max(seconds, 0.0), len(self.index) / self.index.fps)
+            self.pos = float(self.index.frame_at(seconds))
+        elif frame is not None:
+            self.pos = float(min(max(frame, 0), len(self.index) - 1))
+        else:
+            return
+        self.discontinuity = True
+
+    def apply(self, msg):
+        mtype = msg.get("type")
+        with self.cond:
+            if mtype == stream_protocol.PAUSE:
+                self.paused = True
+            elif mtype == stream_protocol.RESUME:
+                self.paused = False
+            elif mtype == stream_protocol.SEEK:
+                self.seek(msg.get("frame"), msg.get("time"))
+            elif mtype == stream_protocol.SET:
+                self.set_params(msg)
+            elif mtype == stream_protocol.STATS:
+                self.last_stats = msg
+                return
+            else:
+                return
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+def control_loop(client_socket, addr, session):
+    """Lee mensajes de control del cliente hasta que cierre la conexión."""
+    try:
+        while True:
+            line = recv_line(client_socket)
+            if line is None:
                 break
-
-    cv2.destroyAllWindows()
+            msg = stream_protocol.decode_control(line)
+            session.apply(msg)
+            if msg.get("type") == stream_protocol.STATS:
+                print(f"{addr}: recibidos={msg.get('received')} perdidos={msg.get('lost')} "
+                      f"latencia={msg.get('latency_ms')} ms fps={msg.get('fps')}")
+    except (OSError, ValueError):
+        pass
+    finally:
+        session.close()
+
+def reencode(data, quality, pool):
+    """Recodifica un JPEG del índice con otra calidad, usando el pool de codificación."""
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return pool.encode(frame, quality)
+
+def handle_client(client_socket, addr, catalog):
+    seq = 0
+    try:
+        req = stream_protocol.decode_control(recv_line(client_socket))
+        names = catalog.names()
+        name = str(req.get("video") or (names[0] if names else ""))
+        index = catalog.get(name)
+        if index is None:
+            print(f"{addr}: video no encontrado '{name}'")
+            client_socket.sendall(stream_protocol.pack_end(seq))
+            return
+
+        session = Session(index, req)
+        print(f"{addr}: '{name}' desde frame {int(session.pos)} (loop={session.loop})")
+        threading.Thread(target=control_loop, args=(client_socket, addr, session), daemon=True).start()
+
+        next_time = time.monotonic()
+        while server_running:
+            with session.cond:
+                if session.paused:
+                    # En pausa no se envía nada: el hilo duerme hasta RESUME/SEEK o desconexión
+                    while session.paused and not session.closed:
+                        session.cond.wait()
+                    next_time = time.monotonic()
+                if session.closed:
+                    return
+                pos = int(session.pos)
+                if pos >= len(index):
+                    if not session.loop:
+                        break
+                    session.pos = pos = 0
+                    session.discontinuity = True
+                flags = stream_protocol.FLAG_KEYFRAME
+                if session.discontinuity:
+                    flags |= stream_protocol.FLAG_DISCONTINUITY
+                    session.discontinuity = False
+                step = index.fps / session.fps
+                session.pos += step
+                frame_interval = 1.0 / session.fps
+                quality = session.quality
+
+            data = index.frame(pos)
+            if quality != index.quality:
+                data = reencode(data, quality, catalog.pool)
+            preview_slot.publish(data)
+
+            # Enviar cabecera + frame
+            pts_us = int(pos * 1_000_000 / index.fps)
+            client_socket.sendall(stream_protocol.pack_frame(seq, pts_us, data, quality,
+                                                             index.width, index.height, flags))
+            seq += 1
+
+            # Respetar FPS (con plazo absoluto para no acumular deriva)
+            next_time += frame_interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Atrasados: se descartan los frames que ya no llegan a tiempo.
+                # El hueco en seq le indica la pérdida al cliente.
+                skipped = int(-delay / frame_interval)
+                if skipped:
+                    seq += skipped
+                    with session.cond:
+                        session.pos += skipped * step
+                next_time = time.monotonic()
+
+        client_socket.sendall(stream_protocol.pack_end(seq))
+        print(f"{addr}: stream terminado.")
+    except Exception as e:
+        print(f"Client Disconnected: {e}")
+    finally:
+        client_socket.close()
 
 def main():
+    global server_running
+    parser = argparse.ArgumentParser(description="Servidor de video (catálogo de archivos)")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--dir", default=".", help="directorio con los videos")
+    parser.add_argument("--encode-workers", type=int, default=None,
+                        help="trabajadores de codificación JPEG (por defecto, uno por núcleo; 0 = en línea)")
+    parser.add_argument("--encode-mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--preview", action="store_true", help="mostrar en una ventana lo que se envía")
+    parser.add_argument("--preview-fps", type=float, default=15.0, help="tasa máxima de la vista previa")
+    args = parser.parse_args()
+
+    pool = EncodePool(args.encode_workers, args.encode_mode)
+    catalog = VideoCatalog(args.dir, pool=pool)
+    print(f"Videos disponibles: {', '.join(catalog.names()) or '(ninguno)'}")
+
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server.bind(('0.0.0.0', 5000))
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('0.0.0.0', args.port))
     server.listen(5)
     print("Server started, waiting for connection...")
 
-    videoCapture = cv2.VideoCapture("zapato.mp4")
-    
-    # Calcular FPS
-    fps = videoCapture.get(cv2.CAP_PROP_FPS)
-    if fps == 0:
-        fps = 25
-    frame_interval = 1.0 / fps
-
-    # Lanzar hilo que solo muestra, no lee video
-    show_camera = threading.Thread(target=show)
-    show_camera.start()
-
-    while True:
-        if video_finished:
-            print("Cerrando servidor: video terminado.")
-            break
-
-        client_socket, addr = server.accept()
-        print(f"Connection from {addr} has been established!")
-        client_handler = threading.Thread(target=handle_client, args=(client_socket, videoCapture, frame_interval))
-        client_handler.start()
-
-    server.close()
+    def stop():
+        global server_running
+        server_running = False
+        try:
+            server.shutdown(socket.SHUT_RDWR)  # despierta al accept() bloqueado
+        except OSError:
+            pass
+
+    # Vista previa opcional; sin ella el servidor no hace nada entre frames
+    preview = None
+    if args.preview:
+        preview = Preview(preview_slot, args.preview_fps, on_quit=stop)
+        preview.start()
+
+    try:
+        while server_running:
+            try:
+                client_socket, addr = server.accept()
+            except OSError:
+                break
+            print(f"Connection from {addr} has been established!")
+            client_handler = threading.Thread(target=handle_client, args=(client_socket, addr, catalog), daemon=True)
+            client_handler.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server_running = False
+        if preview is not None:
+            preview.stop()
+        server.close()
+        catalog.close()
+        pool.close()
 
 if __name__ == '__main__':
     main()
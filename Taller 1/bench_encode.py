@@ -0,0 +1,63 @@
+#Benchmark: FPS codificados vs número de trabajadores, con una fuente sintética
+import argparse
+import os
+import time
+
+import numpy as np
+
+from encoder import EncodePool
+
+RESOLUTIONS = {"480p": (480, 854), "720p": (720, 1280), "1080p": (1080, 1920)}
+
+def synthetic_frames(height, width, count, distinct=8):
+    """Gradiente en movimiento con algo de ruido: se parece más a video real que ruido puro."""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = []
+    for i in range(distinct):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[..., 0] = (xx + i * 16) % 256
+        frame[..., 1] = (yy + i * 8) % 256
+        frame[..., 2] = ((xx + yy) // 4 + i * 4) % 256
+        frame += rng.integers(0, 16, size=frame.shape, dtype=np.uint8)
+        base.append(frame)
+    for i in range(count):
+        yield base[i % distinct]
+
+def run(pool, height, width, count, quality):
+    t0 = time.perf_counter()
+    n = sum(1 for _ in pool.imap(synthetic_frames(height, width, count), quality))
+    return n / (time.perf_counter() - t0)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--quality", type=int, default=95)
+    parser.add_argument("--modes", default="thread,process")
+    parser.add_argument("--workers", default=None, help="lista separada por comas (por defecto 0,1,2,4,... hasta los núcleos)")
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        cpus = os.cpu_count() or 1
+        counts = [0, 1] + [w for w in (2, 4, 8, 16) if w <= cpus]
+
+    print(f"{args.frames} frames por prueba, calidad {args.quality}, {os.cpu_count()} núcleos")
+    print(f"{'res':>6} {'modo':>8} {'workers':>8} {'fps':>9}")
+    for res, (h, w) in RESOLUTIONS.items():
+        for mode in args.modes.split(","):
+            for workers in counts:
+                if workers == 0 and mode != "thread":
+                    continue  # en línea es igual para ambos modos
+                pool = EncodePool(workers, mode)
+                try:
+                    run(pool, h, w, pool.workers * 2 + 1, args.quality)  # calentar trabajadores
+                    fps = run(pool, h, w, args.frames, args.quality)
+                finally:
+                    pool.close()
+                label = "inline" if workers == 0 else mode
+                print(f"{res:>6} {label:>8} {workers:>8} {fps:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#Benchmark: CPU en reposo y copias por frame, show() original vs vista previa por eventos
+# Sin pantalla no se puede llamar a cv2.imshow/waitKey, así que se reemplazan por nada:
+# lo que se mide es el costo del bucle, de las copias y (con vista previa) del imdecode.
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from preview import LatestFrameSlot
+
+class LegacyDisplay:
+    """Reproduce el esquema original: frame.copy() global por cliente y show() sondeando."""
+
+    def __init__(self):
+        self.current_frame = None
+        self.copies = 0
+        self.running = True
+        self._lock = threading.Lock()
+
+    def publish(self, frame):
+        copy = frame.copy()
+        with self._lock:
+            self.copies += 1
+        self.current_frame = copy
+
+    def show(self):
+        while self.running:
+            if self.current_frame is not None:
+                pass  # cv2.imshow + cv2.waitKey(1)
+
+class HeadlessPreview:
+    """
+    Preview._run sin ventana. Cuenta como copia todo frame que no llega como el
+    mismo objeto que publicó el productor.
+    """
+
+    def __init__(self, slot, original, max_fps):
+        self.slot = slot
+        self.original = original
+        self.min_interval = 1.0 / max_fps
+        self.copies = 0
+        self.shown = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+
+    def start(self):
+        self.slot.watching = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.slot.watching = False
+        self._thread.join()
+
+    def _run(self):
+        seq = 0
+        last_shown = 0.0
+        while not self._stop.is_set():
+            new_seq, data = self.slot.wait_newer(seq, timeout=0.1)
+            if new_seq != seq and data is not None:
+                seq = new_seq
+                if data is not self.original:
+                    self.copies += 1
+                cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)  # cv2.imshow
+                self.shown += 1
+                last_shown = time.monotonic()
+            delay = last_shown + self.min_interval - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+
+def producers(publish, frame, clients, fps, seconds):
+    def run():
+        interval = 1.0 / fps
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            publish(frame)
+            time.sleep(interval)
+    threads = [threading.Thread(target=run) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def measure(fn):
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    fn()
+    return (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--preview-fps", type=float, default=15.0)
+    args = parser.parse_args()
+
+    frame = np.zeros((480, 848, 3), dtype=np.uint8)  # frame decodificado (esquema original)
+    # JPEG del índice (esquema nuevo)
+    jpeg = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])[1].tobytes()
+
+    legacy = LegacyDisplay()
+    show = threading.Thread(target=legacy.show, daemon=True)
+    show.start()
+    legacy_idle = measure(lambda: time.sleep(args.seconds))
+    legacy_busy = measure(lambda: producers(legacy.publish, frame, args.clients, args.fps, args.seconds))
+    legacy.running = False
+    show.join()
+
+    # sin vista previa nadie mira el slot: publish() retorna sin tocarlo
+    slot = LatestFrameSlot()
+    new_idle = measure(lambda: time.sleep(args.seconds))
+    new_busy = measure(lambda: producers(slot.publish, jpeg, args.clients, args.fps, args.seconds))
+    unwatched_stored = slot.published
+
+    # con vista previa (watching=True): el slot guarda la referencia y la ventana decodifica a su tasa
+    slot = LatestFrameSlot()
+    preview = HeadlessPreview(slot, jpeg, args.preview_fps)
+    preview.start()
+    watched_idle = measure(lambda: time.sleep(args.seconds))
+    watched_busy = measure(lambda: producers(slot.publish, jpeg, args.clients, args.fps, args.seconds))
+    preview.stop()
+
+    sent = int(args.clients * args.fps * args.seconds)
+    print(f"{args.clients} clientes a {args.fps:g} fps durante {args.seconds:g} s (~{sent} frames enviados)")
+    print(f"{'esquema':>22} {'CPU reposo':>11} {'CPU enviando':>13} {'copias':>8} {'guardados':>10} {'mostrados':>10}")
+    print(f"{'original (show)':>22} {legacy_idle:>10.1%} {legacy_busy:>12.1%} {legacy.copies:>8} "
+          f"{legacy.copies:>10} {'-':>10}")
+    print(f"{'nuevo (sin preview)':>22} {new_idle:>10.1%} {new_busy:>12.1%} {'-':>8} "
+          f"{unwatched_stored:>10} {'-':>10}")
+    print(f"{'nuevo (con preview)':>22} {watched_idle:>10.1%} {watched_busy:>12.1%} {preview.copies:>8} "
+          f"{slot.published:>10} {preview.shown:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#Prueba de carga por loopback: cientos de espectadores sin ventana contra 3_relay.py
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import stream_protocol
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+async def viewer(port, results):
+    """Espectador sin ventana: lee cabecera + JPEG hasta el fin de stream, sin decodificar."""
+    for _ in range(50):
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+    else:
+        results.append(None)
+        return
+    writer.write(stream_protocol.encode_control(stream_protocol.PLAY))
+    await writer.drain()
+
+    frames = lost = 0
+    last_seq = None
+    first = last = None
+    latency_sum = 0.0
+    try:
+        while True:
+            header = stream_protocol.unpack_header(await reader.readexactly(stream_protocol.HEADER.size))
+            if header.kind == stream_protocol.KIND_END:
+                break
+            await reader.readexactly(header.length)
+            now = time.perf_counter()
+            first = first or now
+            last = now
+            latency_sum += (stream_protocol.now_us() - header.send_us) / 1000
+            if last_seq is not None and header.seq > last_seq + 1:
+                lost += header.seq - last_seq - 1
+            last_seq = header.seq
+            frames += 1
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    writer.close()
+    fps = (frames - 1) / (last - first) if frames > 1 and last > first else 0.0
+    results.append((frames, lost, fps, latency_sum / frames if frames else 0.0))
+
+async def run_viewers(port, count):
+    results = []
+    await asyncio.gather(*(viewer(port, results) for _ in range(count)))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--viewers", default="10,100,300", help="lista separada por comas")
+    parser.add_argument("--port", type=int, default=5600)
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--fps", type=float, default=None)
+    args = parser.parse_args()
+
+    print(f"{'viewers':>8} {'fps medio':>10} {'fps min':>8} {'perdidos':>9} {'lat. ms':>8} {'CPU relay':>10}")
+    for count in (int(v) for v in args.viewers.split(",")):
+        cmd = [sys.executable, os.path.join(HERE, "3_relay.py"), "--port", str(args.port),
+               "--dir", HERE, "--min-viewers", str(count)]
+        if args.video:
+            cmd += ["--video", args.video]
+        if args.fps:
+            cmd += ["--fps", str(args.fps)]
+
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        t0 = time.perf_counter()
+        relay = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+        results = asyncio.run(run_viewers(args.port, count))
+        relay.wait(timeout=60)
+        wall = time.perf_counter() - t0
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+        ok = [r for r in results if r]
+        fps = [r[2] for r in ok]
+        print(f"{count:>8} {sum(fps) / max(len(fps), 1):>10.1f} {min(fps, default=0):>8.1f} "
+              f"{sum(r[1] for r in ok):>9} {sum(r[3] for r in ok) / max(len(ok), 1):>8.1f} {cpu / wall:>9.1%}")
+        if len(ok) < count:
+            print(f"  {count - len(ok)} espectadores no pudieron conectarse")
+
+if __name__ == "__main__":
+    main()
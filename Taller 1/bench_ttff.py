@@ -0,0 +1,61 @@
+#Benchmark: tiempo hasta el primer frame, en frío (decodificando el video) vs con índice
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from video_index import VideoCatalog, JPEG_QUALITY
+
+def ttff_cold(path, start_frame):
+    """Lo que hacía el servidor original: abrir, avanzar hasta el frame y codificarlo."""
+    t0 = time.perf_counter()
+    cap = cv2.VideoCapture(path)
+    for _ in range(start_frame):
+        cap.grab()
+    ret, frame = cap.read()
+    _, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
+    buffer.tobytes()
+    cap.release()
+    return time.perf_counter() - t0
+
+def ttff_indexed(directory, name, start_frame):
+    """Catálogo nuevo (índice ya en disco): abrir el índice y leer el frame."""
+    t0 = time.perf_counter()
+    catalog = VideoCatalog(directory)
+    catalog.get(name).frame(start_frame)
+    elapsed = time.perf_counter() - t0
+    catalog.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video", nargs="?", default="zapato.mp4")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, os.path.basename(args.video))
+        shutil.copy(args.video, path)
+        name = os.path.splitext(os.path.basename(path))[0]
+
+        t0 = time.perf_counter()
+        catalog = VideoCatalog(workdir)
+        index = catalog.get(name)
+        total = len(index)
+        catalog.close()
+        print(f"Construcción del índice: {time.perf_counter() - t0:.3f} s ({total} frames)")
+
+        print(f"{'frame':>8} {'frío (ms)':>12} {'índice (ms)':>12}")
+        for start in (0, total // 2, total - 1):
+            cold = min(ttff_cold(path, start) for _ in range(args.repeat))
+            warm = min(ttff_indexed(workdir, name, start) for _ in range(args.repeat))
+            print(f"{start:>8} {cold * 1000:>12.2f} {warm * 1000:>12.2f}")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
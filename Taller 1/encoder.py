@@ -0,0 +1,144 @@
+#Codificación JPEG repartida en varios núcleos (hilos o procesos)
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, Tuple
+
+import cv2
+import numpy as np
+
+def _encode(frame, quality):
+    ok, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not ok:
+        raise ValueError("cv2.imencode falló")
+    return buffer.tobytes()
+
+# ---------- Lado del proceso trabajador ----------
+_attached: Dict[int, Tuple[str, shared_memory.SharedMemory]] = {}  # slot -> (nombre, bloque)
+
+def _encode_shared(slot, name, shape, dtype, quality):
+    """Codifica el frame que el proceso principal dejó en la memoria compartida `name`."""
+    cached = _attached.get(slot)
+    if cached is not None and cached[0] == name:
+        shm = cached[1]
+    else:
+        if cached is not None:
+            # el slot cambió de bloque (frame más grande): el viejo ya fue liberado
+            cached[1].close()
+        # el bloque es del proceso principal (y de su resource_tracker); aquí solo se abre
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[slot] = (name, shm)
+    frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return _encode(frame, quality)
+
+# ---------- Lado del proceso principal ----------
+class _Slot:
+    """Bloque de memoria compartida reutilizable donde se copia un frame para un trabajador."""
+
+    def __init__(self, key):
+        self.key = key
+        self.shm = None
+
+    def load(self, frame):
+        if self.shm is None or self.shm.size < frame.nbytes:
+            self.release()
+            self.shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.shm.buf)[...] = frame
+        return self.shm.name
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+class EncodePool:
+    """
+    Reparte cv2.imencode entre `workers` trabajadores y devuelve los JPEG en el
+    mismo orden en que entraron los frames.
+      - mode="thread": hilos (OpenCV libera el GIL mientras codifica).
+      - mode="process": procesos; el frame viaja por memoria compartida, no por pickle.
+      - workers=0: codifica en el hilo que llama (comportamiento original).
+    """
+
+    def __init__(self, workers=None, mode="thread"):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Modo de codificación desconocido: {mode}")
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.mode = mode
+        self._executor = None
+        self._slots = None
+        if self.workers <= 0:
+            return
+        if mode == "thread":
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="encode")
+        else:
+            self._executor = ProcessPoolExecutor(self.workers)
+            self._all_slots = [_Slot(i) for i in range(self.workers * 2)]
+            self._slots = queue.Queue()
+            for slot in self._all_slots:
+                self._slots.put(slot)
+        self._closed = threading.Event()
+
+    def encode(self, frame: np.ndarray, quality: int) -> bytes:
+        if self._executor is None:
+            return _encode(frame, quality)
+        return next(self.imap([frame], quality))
+
+    def imap(self, frames: Iterable[np.ndarray], quality: int) -> Iterator[bytes]:
+        """Codifica `frames` en paralelo con una ventana acotada; el resultado sale en orden."""
+        if self._executor is None:
+            for frame in frames:
+                yield _encode(frame, quality)
+            return
+
+        window = self.workers * 2
+        pending = deque()  # (future, slot) en orden de entrada
+        try:
+            for frame in frames:
+                if len(pending) >= window:
+                    yield self._finish(*pending.popleft())
+                if self._slots is None:
+                    pending.append((self._executor.submit(_encode, frame, quality), None))
+                    continue
+                # sin bloques libres: esperar el más viejo propio antes que bloquear a ciegas
+                while pending and self._slots.empty():
+                    yield self._finish(*pending.popleft())
+                slot = self._slots.get()
+                try:
+                    name = slot.load(frame)
+                    future = self._executor.submit(_encode_shared, slot.key, name, frame.shape, frame.dtype.str, quality)
+                except BaseException:
+                    self._slots.put(slot)
+                    raise
+                pending.append((future, slot))
+            while pending:
+                yield self._finish(*pending.popleft())
+        finally:
+            for future, slot in pending:
+                future.cancel()
+                if slot is not None:
+                    try:
+                        future.result()
+                    except BaseException:
+                        pass
+                    self._slots.put(slot)
+
+    def _finish(self, future, slot):
+        try:
+            return future.result()
+        finally:
+            if slot is not None:
+                self._slots.put(slot)
+
+    def close(self):
+        if self._executor is None or self._closed.is_set():
+            return
+        self._closed.set()
+        self._executor.shutdown(wait=True)
+        if self._slots is not None:
+            for slot in self._all_slots:
+                slot.release()
@@ -0,0 +1,91 @@
+#Vista previa opcional del servidor: último frame enviado, a una tasa máxima
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+class LatestFrameSlot:
+    """
+    Guarda solo el último JPEG publicado. Si nadie está mirando, publish() no toma
+    el lock ni guarda nada; los bytes nunca se copian (se guarda la referencia).
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.watching = False
+        self.published = 0  # frames aceptados en el slot (para el benchmark)
+        self._data: Optional[bytes] = None
+        self._seq = 0
+
+    def publish(self, data: bytes) -> None:
+        if not self.watching:
+            return
+        with self.cond:
+            self._data = data
+            self._seq += 1
+            self.published += 1
+            self.cond.notify_all()
+
+    def wait_newer(self, last_seq: int, timeout: Optional[float] = None) -> Tuple[int, Optional[bytes]]:
+        """Espera (sin consumir CPU) a un frame más nuevo que last_seq."""
+        with self.cond:
+            self.cond.wait_for(lambda: self._seq != last_seq, timeout)
+            return self._seq, self._data
+
+class Preview:
+    """Hilo que muestra el slot en una ventana, como máximo a max_fps. 'q' cierra la ventana."""
+
+    def __init__(self, slot: LatestFrameSlot, max_fps: float = 15.0,
+                 on_quit: Optional[Callable[[], None]] = None, window: str = 'Frame'):
+        self.slot = slot
+        self.min_interval = 1.0 / max_fps
+        self.on_quit = on_quit
+        self.window = window
+        self.frames_shown = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.slot.watching = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.slot.watching = False
+        with self.slot.cond:
+            self.slot.cond.notify_all()
+
+    def _run(self):
+        seq = 0
+        last_shown = 0.0
+        quit_requested = False
+        try:
+            while not self._stop.is_set():
+                # el timeout solo existe para atender la ventana (teclas) cuando no llegan frames
+                new_seq, data = self.slot.wait_newer(seq, timeout=0.1)
+                if new_seq != seq and data is not None:
+                    seq = new_seq
+                    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if frame is not None:
+                        cv2.imshow(self.window, frame)
+                        self.frames_shown += 1
+                    last_shown = time.monotonic()
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    quit_requested = True
+                    break
+                # respetar la tasa máxima: los frames intermedios simplemente se sobrescriben
+                delay = last_shown + self.min_interval - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+        except cv2.error as e:
+            print(f"Vista previa no disponible: {e}")
+        finally:
+            self.slot.watching = False
+            try:
+                cv2.destroyAllWindows()
+            except cv2.error:
+                pass
+            if quit_requested and self.on_quit:
+                self.on_quit()
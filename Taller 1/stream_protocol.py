@@ -0,0 +1,70 @@
+#Protocolo del stream de video: cabecera binaria por frame + mensajes de control JSON
+import json
+import struct
+import time
+from typing import NamedTuple, Optional
+
+VERSION = 1
+
+# Servidor -> cliente: cabecera fija (32 bytes, big-endian) seguida de `length` bytes JPEG.
+#   version, kind, flags, quality, seq, pts_us, send_us, width, height, length
+HEADER = struct.Struct("!BBBBIqqHHI")
+
+KIND_FRAME = 1
+KIND_END = 2  # fin del stream, sin payload
+
+FLAG_KEYFRAME = 0x01       # el payload se decodifica solo (siempre cierto con JPEG)
+FLAG_DISCONTINUITY = 0x02  # el pts salta: inicio, seek o vuelta al principio (loop)
+
+# Cliente -> servidor: una línea JSON por mensaje, {"type": ..., ...}
+PLAY = "PLAY"      # {"video", "start_frame" | "start_time", "loop", "fps", "quality"}
+PAUSE = "PAUSE"
+RESUME = "RESUME"
+SEEK = "SEEK"      # {"frame"} o {"time"} en segundos
+SET = "SET"        # {"fps"} y/o {"quality"}
+STATS = "STATS"    # {"received", "lost", "latency_ms", "fps"}
+
+class FrameHeader(NamedTuple):
+    version: int
+    kind: int
+    flags: int
+    quality: int
+    seq: int
+    pts_us: int
+    send_us: int
+    width: int
+    height: int
+    length: int
+
+def now_us() -> int:
+    """Reloj de pared en microsegundos (la latencia entre equipos requiere relojes sincronizados)."""
+    return time.time_ns() // 1000
+
+def pack_frame(seq: int, pts_us: int, data: bytes, quality: int, width: int, height: int,
+               flags: int = FLAG_KEYFRAME) -> bytes:
+    header = HEADER.pack(VERSION, KIND_FRAME, flags, quality, seq & 0xFFFFFFFF, pts_us, now_us(),
+                         width, height, len(data))
+    return header + data
+
+def pack_end(seq: int) -> bytes:
+    return HEADER.pack(VERSION, KIND_END, 0, 0, seq & 0xFFFFFFFF, 0, now_us(), 0, 0, 0)
+
+def unpack_header(data: bytes) -> FrameHeader:
+    header = FrameHeader(*HEADER.unpack(data))
+    if header.version != VERSION:
+        raise ValueError(f"Versión de protocolo no soportada: {header.version}")
+    return header
+
+def encode_control(mtype: str, **fields) -> bytes:
+    fields["type"] = mtype
+    return (json.dumps(fields) + "\n").encode("utf-8")
+
+def decode_control(line: Optional[str]) -> dict:
+    """Convierte una línea en mensaje de control; {} si no es JSON válido."""
+    if not line:
+        return {}
+    try:
+        msg = json.loads(line)
+    except json.JSONDecodeError:
+        return {}
+    return msg if isinstance(msg, dict) else {}
@@ -0,0 +1,185 @@
+#Catálogo de videos con índice en disco de frames JPEG ya codificados
+import json
+import mmap
+import os
+import threading
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from encoder import EncodePool
+
+INDEX_DIR = ".video_index"
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov")
+DEFAULT_FPS = 25
+JPEG_QUALITY = 95  # mismo valor por defecto que cv2.imencode
+INDEX_VERSION = 1
+
+def _source_signature(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def build_index(source_path: str, index_dir: str, name: str, quality: int = JPEG_QUALITY,
+                pool: Optional[EncodePool] = None) -> None:
+    """
+    Decodifica el video una sola vez y guarda cada frame como JPEG en un archivo
+    de datos contiguo (<name>.jpgs) junto a una tabla de offsets (<name>.offsets.npy)
+    y los metadatos (<name>.json). Se escribe en temporales y se renombra al final
+    para que un índice a medias nunca se use. La decodificación es secuencial; la
+    codificación se reparte en `pool` si se indica.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    data_path = os.path.join(index_dir, name + ".jpgs")
+    offsets_path = os.path.join(index_dir, name + ".offsets.npy")
+    meta_path = os.path.join(index_dir, name + ".json")
+
+    cap = cv2.VideoCapture(source_path)
+    if not cap.isOpened():
+        raise ValueError(f"No se pudo abrir el video: {source_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+
+    offsets: List[tuple] = []
+    shape = [0, 0]
+    pos = 0
+
+    def decoded_frames():
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            shape[:] = frame.shape[:2]
+            yield frame
+
+    if pool is None:
+        pool = EncodePool(workers=0)
+    try:
+        with open(data_path + ".tmp", "wb") as f:
+            for data in pool.imap(decoded_frames(), quality):
+                f.write(data)
+                offsets.append((pos, len(data)))
+                pos += len(data)
+    finally:
+        cap.release()
+
+    if not offsets:
+        os.remove(data_path + ".tmp")
+        raise ValueError(f"El video no tiene frames: {source_path}")
+
+    with open(offsets_path + ".tmp", "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.uint64))
+    meta = {
+        "version": INDEX_VERSION,
+        "fps": fps,
+        "frames": len(offsets),
+        "width": shape[1],
+        "height": shape[0],
+        "quality": int(quality),
+        "source": _source_signature(source_path),
+    }
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(offsets_path + ".tmp", offsets_path)
+    os.replace(meta_path + ".tmp", meta_path)  # el json va último: marca el índice como completo
+
+class VideoIndex:
+    """Acceso de solo lectura a un índice ya construido. Se comparte entre todos los clientes."""
+
+    def __init__(self, index_dir: str, name: str):
+        self.name = name
+        with open(os.path.join(index_dir, name + ".json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.fps: float = meta["fps"]
+        self.width: int = meta["width"]
+        self.height: int = meta["height"]
+        self.quality: int = meta["quality"]
+        self.offsets = np.load(os.path.join(index_dir, name + ".offsets.npy"), mmap_mode="r")
+        self._file = open(os.path.join(index_dir, name + ".jpgs"), "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.fps
+
+    def frame(self, i: int) -> bytes:
+        """Devuelve los bytes JPEG del frame i."""
+        off, size = self.offsets[i]
+        return self._mmap[int(off):int(off) + int(size)]
+
+    def frame_at(self, seconds: float) -> int:
+        """Convierte un timestamp (segundos) en número de frame, acotado al video."""
+        return min(max(int(seconds * self.fps), 0), len(self) - 1)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+def _index_is_fresh(index_dir: str, name: str, source_path: str, quality: int) -> bool:
+    try:
+        with open(os.path.join(index_dir, name + ".json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (meta.get("version") == INDEX_VERSION
+            and meta.get("quality") == quality
+            and meta.get("source") == _source_signature(source_path))
+
+class VideoCatalog:
+    """
+    Conjunto de videos de un directorio, identificados por nombre (sin extensión).
+    El índice de cada video se construye la primera vez que se pide y luego se reutiliza.
+    """
+
+    def __init__(self, directory: str, quality: int = JPEG_QUALITY, pool: Optional[EncodePool] = None):
+        self.directory = directory
+        self.index_dir = os.path.join(directory, INDEX_DIR)
+        self.quality = quality
+        self.pool = pool if pool is not None else EncodePool(workers=0)
+        self._indexes: Dict[str, VideoIndex] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def sources(self) -> Dict[str, str]:
+        found = {}
+        for fn in sorted(os.listdir(self.directory)):
+            stem, ext = os.path.splitext(fn)
+            if ext.lower() in VIDEO_EXTS:
+                found.setdefault(stem, os.path.join(self.directory, fn))
+        return found
+
+    def names(self) -> List[str]:
+        return list(self.sources().keys())
+
+    def get(self, name: str) -> Optional[VideoIndex]:
+        """Devuelve el índice del video, construyéndolo si hace falta. None si no existe."""
+        with self._lock:
+            if name in self._indexes:
+                return self._indexes[name]
+            lock = self._locks.setdefault(name, threading.Lock())
+
+        # un lock por video: construir uno no bloquea a los clientes de otro
+        with lock:
+            with self._lock:
+                if name in self._indexes:
+                    return self._indexes[name]
+            source = self.sources().get(name)
+            if source is None:
+                return None
+            if not _index_is_fresh(self.index_dir, name, source, self.quality):
+                print(f"Construyendo índice de '{name}'...")
+                build_index(source, self.index_dir, name, self.quality, self.pool)
+            index = VideoIndex(self.index_dir, name)
+            with self._lock:
+                self._indexes[name] = index
+            return index
+
+    def close(self):
+        with self._lock:
+            for index in self._indexes.values():
+                index.close()
+            self._indexes.clear()
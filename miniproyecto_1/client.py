@@ -1,108 +1,167 @@
 #Cliente para enviar mensajes al servidor
-import json
-import socket
+import argparse
 import threading
 import sys
+import time
 from typing import Optional, Dict, Any, List
 
-HOST = "127.0.0.1"
-PORT = 65432
+from client_api import Connect4Client, HOST, PORT
 
-def print_board_ascii(board: List[List[int]]):
+def format_board_ascii(board: List[List[int]]) -> str:
     symbols = {0:'.', 1:'X', 2:'O'}
-    for row in board:
-        print(' '.join(symbols.get(cell, '?') for cell in row))
-    print(' '.join(str(c) for c in range(len(board[0]))))
-    print()
+    lines = [' '.join(symbols.get(cell, '?') for cell in row) for row in board]
+    lines.append(' '.join(str(c) for c in range(len(board[0]))))
+    return '\n'.join(lines) + '\n\n'
 
-def send_json(conn: socket.socket, payload: dict):
-    line = json.dumps(payload, ensure_ascii=False)
-    conn.sendall((line + "\n").encode("utf-8"))
+class ClientView:
+    """
+    Modelo local de lo que manda el servidor. El hilo receptor solo actualiza el
+    estado; un hilo de dibujo junta las ráfagas y escribe todo de una vez, como
+    máximo max_fps veces por segundo. En modo quiet solo se guarda el estado.
+    """
 
-def receiver_loop(conn: socket.socket):
-    buf = b""
-    try:
+    def __init__(self, quiet: bool = False, max_fps: float = 10.0, out=None):
+        self.quiet = quiet
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.out = out or sys.stdout
+        self.cond = threading.Condition()
+        self.board: Optional[List[List[int]]] = None
+        self.room: Optional[str] = None
+        self.turn: Optional[int] = None
+        self.players: Dict[str, int] = {}
+        self.ended = False
+        self.winner = 0
+        self.version = 0  # cambia cada vez que cambia el tablero o su cabecera
+        self.messages = 0
+        self.renders = 0
+        self._lines: List[str] = []
+        self._board_at = 0  # posición en _lines del último cambio de tablero (para no desordenar)
+        self._drawn_version = 0
+        self._closed = False
+        self._thread = None
+        if not quiet:
+            self._thread = threading.Thread(target=self._render_loop, daemon=True)
+            self._thread.start()
+
+    def log(self, text: str):
+        with self.cond:
+            if not self.quiet:
+                self._lines.append(text + "\n")
+                self.cond.notify()
+
+    def apply(self, msg: Dict[str, Any]) -> bool:
+        """Aplica un mensaje del servidor. Devuelve False si el servidor cerró la sesión (BYE)."""
+        with self.cond:
+            self.messages += 1
+            if msg.get("type") == "BOARD":
+                state = (msg.get("board"), msg.get("room"), msg.get("turn"), msg.get("players") or {},
+                         bool(msg.get("ended")), msg.get("winner", 0))
+                if state != (self.board, self.room, self.turn, self.players, self.ended, self.winner):
+                    self.board, self.room, self.turn, self.players, self.ended, self.winner = state
+                    self.version += 1
+                    self._board_at = len(self._lines)
+                    self.cond.notify()
+                return True
+            text = format_server_message(msg)
+            if text is not None and not self.quiet:
+                self._lines.append(text + "\n")
+                self.cond.notify()
+            return msg.get("type") != "BYE"
+
+    def close(self, wait: float = 0.0):
+        """Hace un último dibujo con lo pendiente; espera hasta `wait` segundos a que termine."""
+        with self.cond:
+            self._closed = True
+            self.cond.notify()
+        if wait and self._thread is not None:
+            self._thread.join(wait)
+
+    def _frame_text(self) -> str:
+        parts = ["\n=== TABLERO ===\n",
+                 f"Sala: {self.room} | Turno: {self.turn} | Jugadores: {self.players}\n"]
+        if self.board:
+            parts.append(format_board_ascii(self.board))
+        if self.ended:
+            if self.winner == 0:
+                parts.append(">>> EMPATE\n")
+            else:
+                inv = {1:"P1 (X)", 2:"P2 (O)"}
+                parts.append(f">>> GANADOR: {inv.get(self.winner, self.winner)}\n")
+        return ''.join(parts)
+
+    def _render_loop(self):
+        last = 0.0
         while True:
-            data = conn.recv(4096)
-            if not data:
-                print("Conexión cerrada por el servidor.")
-                break
-            buf += data
-            while b"\n" in buf:
-                line, buf = buf.split(b"\n", 1)
-                if not line.strip():
-                    continue
-                try:
-                    msg = json.loads(line.decode("utf-8"))
-                except json.JSONDecodeError:
-                    print("<< Mensaje no-JSON:", line.decode("utf-8"))
-                    continue
-                handle_server_message(msg)
-    except Exception as e:
-        print("Error de recepción:", e)
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+            with self.cond:
+                self.cond.wait_for(lambda: self._closed or self._lines or self.version != self._drawn_version)
+                closed = self._closed
+            # esperar el resto del intervalo: lo que llegue mientras tanto entra en este mismo dibujo
+            delay = last + self.min_interval - time.monotonic()
+            if delay > 0 and not closed:
+                time.sleep(delay)
+            with self.cond:
+                lines = self._lines
+                if self.version != self._drawn_version:
+                    lines = lines[:self._board_at] + [self._frame_text()] + lines[self._board_at:]
+                    self._drawn_version = self.version
+                out = ''.join(lines)
+                self._lines.clear()
+            if out:
+                self.out.write(out)
+                self.out.flush()
+                self.renders += 1
+            last = time.monotonic()
+            if closed:
+                return
 
-def handle_server_message(msg: Dict[str, Any]):
+def format_server_message(msg: Dict[str, Any]) -> Optional[str]:
+    """Texto a mostrar para un mensaje del servidor (BOARD se dibuja aparte)."""
     t = msg.get("type")
 
     if t == "WELCOME":
-        print(msg.get("msg", ""))
+        return msg.get("msg", "")
     elif t == "ERROR":
-        print(f"[ERROR] {msg.get('error')}")
+        return f"[ERROR] {msg.get('error')}"
     elif t == "HELLO_OK":
-        print(f"Conectado como: {msg.get('name')}")
+        return f"Conectado como: {msg.get('name')}"
     elif t == "ROOMS":
-        print("Salas:")
+        lines = ["Salas:"]
         for r in msg.get("rooms", []):
-            print(f"  - {r['room']} | players={r['players']} | spectators={r['spectators']} | started={r['started']} | ended={r['ended']} | vs_server={r['vs_server']}")
+            lines.append(f"  - {r['room']} | players={r['players']} | spectators={r['spectators']} | started={r['started']} | ended={r['ended']} | vs_server={r['vs_server']}")
+        return '\n'.join(lines)
     elif t == "JOINED":
-        print(f"Unido a sala {msg.get('room')} como jugador (mark={msg.get('mark')}).")
+        return f"Unido a sala {msg.get('room')} como jugador (mark={msg.get('mark')})."
     elif t == "SPECTATE_OK":
-        print(f"Espectando sala {msg.get('room')}.")
+        return f"Espectando sala {msg.get('room')}."
     elif t == "INFO":
-        print(f"[INFO] {msg.get('msg')}")
+        return f"[INFO] {msg.get('msg')}"
     elif t == "STARTED":
-        print(f"Partida iniciada en sala={msg.get('room')} turn={msg.get('turn')} vs_server={msg.get('vs_server', False)}")
+        return f"Partida iniciada en sala={msg.get('room')} turn={msg.get('turn')} vs_server={msg.get('vs_server', False)}"
     elif t == "RESET_OK":
-        print(f"Partida reiniciada por ={msg.get('by')}.")
+        return f"Partida reiniciada por ={msg.get('by')}."
     elif t == "MOVE_OK":
         by = msg.get("by")
         col = msg.get("col")
         nxt = msg.get("next")
         if by:
-            print(f"Movimiento de {by} en columna {col}. Siguiente turno: {nxt}")
-    elif t == "BOARD":
-        print("\n=== TABLERO ===")
-        print(f"Sala: {msg.get('room')} | Turno: {msg.get('turn')} | Jugadores: {msg.get('players')}")
-        board = msg.get("board")
-        if board:
-            print_board_ascii(board)
-        if msg.get("ended"):
-            w = msg.get("winner")
-            if w == 0:
-                print(">>> EMPATE")
-            else:
-                inv = {1:"P1 (X)", 2:"P2 (O)"}
-                print(f">>> GANADOR: {inv.get(w, w)}")
+            return f"Movimiento de {by} en columna {col}. Siguiente turno: {nxt}"
+        return None
     elif t == "GAME_OVER":
         w = msg.get("winner")
         if w == 0:
-            print("Juego terminado: EMPATE.")
-        else:
-            inv = {1:"P1 (X)", 2:"P2 (O)"}
-            print(f"Juego terminado. Ganador: {inv.get(w, w)} (by={msg.get('by')})")
+            return "Juego terminado: EMPATE."
+        inv = {1:"P1 (X)", 2:"P2 (O)"}
+        return f"Juego terminado. Ganador: {inv.get(w, w)} (by={msg.get('by')})"
     elif t == "BYE":
-        print("Servidor: BYE")
-        sys.exit(0)
-    else:
-        print("<<", msg)
+        return "Servidor: BYE"
+    elif t == "DISCONNECTED":
+        return "Conexión cerrada por el servidor."
+    elif t == "RECONNECTED":
+        return f"Reconectado (intento {msg.get('attempt')}); recuperando nombre y sala..."
+    return f"<< {msg}"
 
-def help_text():
-    print("""
+def help_text() -> str:
+    return """
 Comandos (escribe y presiona Enter):
   /hello <nombre>                  -> identifica tu usuario
   /list                            -> lista salas
@@ -115,21 +174,26 @@ Comandos (escribe y presiona Enter):
   /move <col>                      -> jugar en columna (0-6)
   /quit                            -> salir
   /help                            -> ver ayuda
-""")
+"""
 
 def main():
-    host = HOST
-    port = PORT
-    if len(sys.argv) >= 2:
-        host = sys.argv[1]
-    if len(sys.argv) >= 3:
-        port = int(sys.argv[2])
+    parser = argparse.ArgumentParser(description="Cliente Conecta-4")
+    parser.add_argument("host", nargs="?", default=HOST)
+    parser.add_argument("port", nargs="?", type=int, default=PORT)
+    parser.add_argument("--max-fps", type=float, default=10.0,
+                        help="redibujos por segundo como máximo (0 = sin límite)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="no imprime nada; solo mantiene el estado (útil para bots de carga)")
+    parser.add_argument("--no-reconnect", action="store_true", help="no reconectar si se cae la conexión")
+    args = parser.parse_args()
+    host, port = args.host, args.port
 
     print(f"Conectando a {host}:{port} ...")
-    conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    conn.connect((host, port))
-    threading.Thread(target=receiver_loop, args=(conn,), daemon=True).start()
-    help_text()
+    view = ClientView(quiet=args.quiet, max_fps=args.max_fps)
+    client = Connect4Client(host, port, reconnect=not args.no_reconnect)
+    client.on("*", view.apply)
+    client.connect()
+    view.log(help_text())
 
     try:
         while True:
@@ -142,57 +206,57 @@ def main():
 
             if line.startswith("/hello "):
                 name = line.split(" ", 1)[1].strip()
-                send_json(conn, {"type": "HELLO", "name": name})
+                client.request("HELLO", name=name)
 
             elif line == "/list":
-                send_json(conn, {"type": "LIST"})
+                client.request("LIST")
 
             elif line.startswith("/create "):
                 sala = line.split(" ", 1)[1].strip()
-                send_json(conn, {"type": "CREATE", "room": sala})
+                client.request("CREATE", room=sala)
 
             elif line.startswith("/join "):
                 sala = line.split(" ", 1)[1].strip()
-                send_json(conn, {"type": "JOIN", "room": sala})
+                client.request("JOIN", room=sala)
 
             elif line.startswith("/spectate "):
                 sala = line.split(" ", 1)[1].strip()
-                send_json(conn, {"type": "SPECTATE", "room": sala})
+                client.request("SPECTATE", room=sala)
 
             elif line == "/start":
-                send_json(conn, {"type": "START"})
+                client.request("START")
 
             elif line.startswith("/start_vs "):
                 sala = line.split(" ", 1)[1].strip()
-                send_json(conn, {"type": "START_VS_SERVER", "room": sala})
+                client.request("START_VS_SERVER", room=sala)
 
             elif line == "/reset":
-                send_json(conn, {"type": "RESET"})
+                client.request("RESET")
 
             elif line.startswith("/move "):
                 try:
                     col = int(line.split(" ", 1)[1].strip())
                 except Exception:
-                    print("Columna inválida.")
+                    view.log("Columna inválida.")
                     continue
-                send_json(conn, {"type": "MOVE", "col": col})
+                client.request("MOVE", col=col)
 
             elif line == "/quit":
-                send_json(conn, {"type": "QUIT"})
+                client.quit()  # espera el BYE (con timeout) y cierra
                 break
 
             elif line == "/help":
-                help_text()
+                view.log(help_text())
 
             else:
-                print("Comando no reconocido. Usa /help")
+                view.log("Comando no reconocido. Usa /help")
     except KeyboardInterrupt:
         pass
+    except ConnectionError as e:
+        view.log(f"Sin conexión: {e}")
     finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+        client.close()
+        view.close(wait=1.0)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,487 @@
+#API de cliente para Conecta-4: uso desde código (bots, benchmarks) sin stdin
+import asyncio
+import json
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+HOST = "127.0.0.1"
+PORT = 65432
+
+# Tipo de petición -> tipo de respuesta que la completa (ERROR completa cualquiera)
+RESPONSES = {
+    "HELLO": "HELLO_OK",
+    "LIST": "ROOMS",
+    "CREATE": "JOINED",
+    "JOIN": "JOINED",
+    "SPECTATE": "SPECTATE_OK",
+    "START": "STARTED",
+    "START_VS_SERVER": "STARTED",
+    "RESET": "RESET_OK",
+    "MOVE": "BOARD",
+    "QUIT": "BYE",
+}
+
+@dataclass
+class Reply:
+    """Respuesta a una petición y su tiempo de ida y vuelta (segundos)."""
+    msg: Dict[str, Any]
+    rtt: float
+
+    @property
+    def ok(self) -> bool:
+        return self.msg.get("type") != "ERROR"
+
+    @property
+    def error(self) -> Optional[str]:
+        return None if self.ok else self.msg.get("error")
+
+class _Pending:
+    """Petición enviada que espera su respuesta. El servidor responde en orden, así que solo mira la primera."""
+
+    def __init__(self, mtype: str, future, sent_at: float):
+        self.mtype = mtype
+        self.expect = RESPONSES[mtype]
+        self.future = future
+        self.sent_at = sent_at
+        # MOVE: primero llega MOVE_OK propio y después el BOARD que lo refleja
+        self.armed = mtype != "MOVE"
+
+    def matches(self, msg: Dict[str, Any], name: Optional[str]) -> bool:
+        t = msg.get("type")
+        if t == "ERROR":
+            return True
+        if self.mtype == "MOVE" and t == "MOVE_OK" and msg.get("by") == name:
+            self.armed = True
+            return False
+        if self.mtype in ("RESET", "START", "START_VS_SERVER") and t == self.expect:
+            # RESET_OK y STARTED son difusiones a la sala: solo cuenta la propia
+            return msg.get("by") == name
+        return self.armed and t == self.expect
+
+class _ClientCore:
+    """Estado, emparejamiento petición/respuesta y callbacks, común a los dos sabores."""
+
+    def __init__(self, reconnect: bool, retry_delay: float, max_retries: int):
+        self.reconnect = reconnect
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.name: Optional[str] = None
+        self.room: Optional[str] = None
+        self.role: Optional[str] = None  # "player" o "spectator"
+        self.board: Optional[List[List[int]]] = None
+        self.last_rtt: Optional[float] = None
+        self._pending: Deque[_Pending] = deque()
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = defaultdict(list)
+        self._closed = False
+
+    def on(self, mtype: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Registra un callback para un tipo de mensaje ("*" = todos). Incluye DISCONNECTED y RECONNECTED."""
+        self._handlers[mtype].append(callback)
+
+    def _emit(self, msg: Dict[str, Any]) -> None:
+        for cb in self._handlers.get(msg.get("type"), []) + self._handlers.get("*", []):
+            try:
+                cb(msg)
+            except Exception as e:
+                print(f"Error en callback: {e}")
+
+    def _track(self, msg: Dict[str, Any]) -> None:
+        t = msg.get("type")
+        if t == "HELLO_OK":
+            self.name = msg.get("name")
+        elif t == "JOINED":
+            self.room, self.role = msg.get("room"), "player"
+        elif t == "SPECTATE_OK":
+            self.room, self.role = msg.get("room"), "spectator"
+        elif t == "STARTED" and msg.get("vs_server") and self.role is None:
+            self.room, self.role = msg.get("room"), "player"
+        elif t == "BOARD":
+            self.board = msg.get("board")
+
+    def _match(self, msg: Dict[str, Any]):
+        """Devuelve (pending, Reply) si el mensaje completa la petición más antigua."""
+        # las que vencieron o se cancelaron ya no esperan nada: no deben tapar a las siguientes
+        while self._pending and self._pending[0].future.done():
+            self._pending.popleft()
+        if self._pending and self._pending[0].matches(msg, self.name):
+            pending = self._pending.popleft()
+            reply = Reply(msg, time.perf_counter() - pending.sent_at)
+            self.last_rtt = reply.rtt
+            return pending, reply
+        return None
+
+    def _rejoin_requests(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Peticiones para recuperar la sesión tras reconectar: nombre y sala."""
+        reqs = []
+        if self.name:
+            reqs.append(("HELLO", {"name": self.name}))
+            if self.room and self.role == "player":
+                reqs.append(("JOIN", {"room": self.room}))
+            elif self.room and self.role == "spectator":
+                reqs.append(("SPECTATE", {"room": self.room}))
+        return reqs
+
+    @staticmethod
+    def _encode(payload: Dict[str, Any]) -> bytes:
+        return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+        if not line.strip():
+            return None
+        try:
+            msg = json.loads(line.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return {"type": "INVALID_JSON", "raw": line.decode("utf-8", "replace")}
+        return msg if isinstance(msg, dict) else None
+
+# ========== Sabor síncrono (hilo receptor) ==========
+class Connect4Client(_ClientCore):
+    """
+    Cliente bloqueante. request() devuelve un Future (permite encadenar varias
+    peticiones sin esperar); los métodos hello(), join(), move()... esperan la respuesta.
+    Los callbacks se ejecutan en el hilo receptor.
+    """
+
+    def __init__(self, host: str = HOST, port: int = PORT, timeout: float = 5.0,
+                 reconnect: bool = True, retry_delay: float = 0.5, max_retries: int = 10):
+        super().__init__(reconnect, retry_delay, max_retries)
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()  # mantiene el orden de envío igual al de _pending
+        self._lock = threading.Lock()       # protege _pending (también lo usa el hilo receptor)
+        self._thread: Optional[threading.Thread] = None
+
+    def connect(self) -> "Connect4Client":
+        self._sock = socket.create_connection((self.host, self.port))
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+        return self
+
+    def send(self, mtype: str, **fields) -> None:
+        """Envía sin esperar respuesta."""
+        fields["type"] = mtype
+        with self._send_lock:
+            if self._sock is None:
+                raise ConnectionError("No conectado")
+            self._sock.sendall(self._encode(fields))
+
+    def request(self, mtype: str, **fields) -> "Future[Reply]":
+        with self._send_lock:
+            if self._sock is None:
+                future: Future = Future()
+                future.set_exception(ConnectionError("No conectado"))
+                return future
+            return self._request_locked(self._sock, mtype, fields)
+
+    def _request_locked(self, sock: socket.socket, mtype: str, fields: Dict[str, Any]) -> "Future[Reply]":
+        """Registra y envía una petición; hay que llamarlo con _send_lock tomado."""
+        fields["type"] = mtype
+        future: Future = Future()
+        pending = _Pending(mtype, future, time.perf_counter())
+        # se registra antes de enviar: la respuesta no puede adelantarse a su petición
+        with self._lock:
+            self._pending.append(pending)
+        try:
+            sock.sendall(self._encode(fields))
+        except OSError as e:
+            with self._lock:
+                if pending in self._pending:
+                    self._pending.remove(pending)
+            if not future.done():
+                future.set_exception(ConnectionError(str(e)))
+        return future
+
+    def _call(self, mtype: str, **fields) -> Reply:
+        future = self.request(mtype, **fields)
+        try:
+            return future.result(self.timeout)
+        except Exception:
+            future.cancel()  # si venció sigue pendiente: _match la descarta
+            raise
+
+    def hello(self, name: str) -> Reply:
+        return self._call("HELLO", name=name)
+
+    def list_rooms(self) -> Reply:
+        return self._call("LIST")
+
+    def create(self, room: str) -> Reply:
+        return self._call("CREATE", room=room)
+
+    def join(self, room: str) -> Reply:
+        return self._call("JOIN", room=room)
+
+    def spectate(self, room: str) -> Reply:
+        return self._call("SPECTATE", room=room)
+
+    def start(self) -> Reply:
+        return self._call("START")
+
+    def start_vs_server(self, room: str) -> Reply:
+        return self._call("START_VS_SERVER", room=room)
+
+    def reset(self) -> Reply:
+        return self._call("RESET")
+
+    def move(self, col: int) -> Reply:
+        return self._call("MOVE", col=col)
+
+    def quit(self) -> Optional[Reply]:
+        self._closed = True  # no reconectar después de QUIT
+        try:
+            return self._call("QUIT")
+        except Exception:
+            return None
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    # ---------- hilo receptor ----------
+    def _reader(self):
+        while True:
+            sock = self._sock
+            if sock is not None:
+                self._read_until_closed(sock)
+            # las peticiones hechas mientras no hay conexión fallan enseguida
+            with self._send_lock:
+                if self._sock is sock:
+                    self._sock = None
+            if sock is not None:
+                sock.close()
+            self._fail_pending(ConnectionError("Conexión cerrada"))
+            self._emit({"type": "DISCONNECTED"})
+            if self._closed or not self.reconnect or not self._reconnect():
+                return
+
+    def _read_until_closed(self, sock: socket.socket):
+        buf = b""
+        try:
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                buf += data
+                lines = buf.split(b"\n")
+                buf = lines.pop()
+                for line in lines:
+                    msg = self._decode(line)
+                    if msg is not None:
+                        self._handle(msg)
+        except OSError:
+            return
+
+    def _handle(self, msg: Dict[str, Any]):
+        self._track(msg)
+        with self._lock:
+            done = self._match(msg)
+        if done is not None:
+            pending, reply = done
+            if not pending.future.done():
+                try:
+                    pending.future.set_result(reply)
+                except InvalidStateError:
+                    pass  # cancelada justo ahora por quien la pidió
+        self._emit(msg)
+
+    def _fail_pending(self, exc: Exception):
+        with self._lock:
+            pending, self._pending = list(self._pending), deque()
+        for p in pending:
+            if not p.future.done():
+                p.future.set_exception(exc)
+
+    def _reconnect(self) -> bool:
+        for attempt in range(self.max_retries):
+            if self._closed:
+                return False
+            time.sleep(self.retry_delay * (2 ** min(attempt, 4)))
+            try:
+                sock = socket.create_connection((self.host, self.port))
+            except OSError:
+                continue
+            with self._send_lock:
+                if self._closed:
+                    sock.close()
+                    return False
+                # nada de la conexión anterior puede quedar delante de las peticiones de reingreso
+                self._fail_pending(ConnectionError("Conexión cerrada"))
+                # las respuestas las empareja este mismo hilo al seguir leyendo
+                for mtype, fields in self._rejoin_requests():
+                    self._request_locked(sock, mtype, fields)
+                self._sock = sock
+            self._emit({"type": "RECONNECTED", "attempt": attempt + 1})
+            return True
+        return False
+
+# ========== Sabor asyncio ==========
+class AsyncConnect4Client(_ClientCore):
+    """
+    Cliente para asyncio. request() devuelve un asyncio.Future (se puede hacer
+    gather de varias peticiones en vuelo); hello(), join(), move()... son corutinas.
+    Los callbacks se ejecutan en el event loop.
+    """
+
+    def __init__(self, host: str = HOST, port: int = PORT, timeout: float = 5.0,
+                 reconnect: bool = True, retry_delay: float = 0.5, max_retries: int = 10):
+        super().__init__(reconnect, retry_delay, max_retries)
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> "AsyncConnect4Client":
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._task = asyncio.create_task(self._reader(reader))
+        return self
+
+    def send(self, mtype: str, **fields) -> None:
+        """Envía sin esperar respuesta."""
+        fields["type"] = mtype
+        if self._writer is None or self._writer.is_closing():
+            raise ConnectionError("No conectado")
+        self._writer.write(self._encode(fields))
+
+    def request(self, mtype: str, **fields) -> "asyncio.Future[Reply]":
+        fields["type"] = mtype
+        future = asyncio.get_running_loop().create_future()
+        if self._writer is None or self._writer.is_closing():
+            future.set_exception(ConnectionError("No conectado"))
+            return future
+        self._pending.append(_Pending(mtype, future, time.perf_counter()))
+        self._writer.write(self._encode(fields))
+        return future
+
+    async def _call(self, mtype: str, **fields) -> Reply:
+        future = self.request(mtype, **fields)
+        if self._writer is not None:
+            try:
+                await self._writer.drain()
+            except ConnectionError:
+                pass  # el lector falla la petición
+        # al vencer, wait_for cancela el future y _match lo descarta
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def hello(self, name: str) -> Reply:
+        return await self._call("HELLO", name=name)
+
+    async def list_rooms(self) -> Reply:
+        return await self._call("LIST")
+
+    async def create(self, room: str) -> Reply:
+        return await self._call("CREATE", room=room)
+
+    async def join(self, room: str) -> Reply:
+        return await self._call("JOIN", room=room)
+
+    async def spectate(self, room: str) -> Reply:
+        return await self._call("SPECTATE", room=room)
+
+    async def start(self) -> Reply:
+        return await self._call("START")
+
+    async def start_vs_server(self, room: str) -> Reply:
+        return await self._call("START_VS_SERVER", room=room)
+
+    async def reset(self) -> Reply:
+        return await self._call("RESET")
+
+    async def move(self, col: int) -> Reply:
+        return await self._call("MOVE", col=col)
+
+    async def quit(self) -> Optional[Reply]:
+        self._closed = True
+        try:
+            return await self._call("QUIT")
+        except Exception:
+            return None
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+        if self._task is not None and self._task is not asyncio.current_task():
+            try:
+                await self._task
+            except Exception:
+                pass
+
+    def _drop_writer(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+
+    def _fail_pending(self):
+        pending, self._pending = list(self._pending), deque()
+        for p in pending:
+            if not p.future.done():
+                p.future.set_exception(ConnectionError("Conexión cerrada"))
+
+    async def _reader(self, reader: asyncio.StreamReader):
+        while True:
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    msg = self._decode(line.rstrip(b"\n"))
+                    if msg is None:
+                        continue
+                    self._track(msg)
+                    done = self._match(msg)
+                    if done is not None and not done[0].future.done():
+                        done[0].future.set_result(done[1])
+                    self._emit(msg)
+            except (ConnectionError, OSError):
+                pass
+            # las peticiones hechas mientras no hay conexión fallan enseguida
+            self._drop_writer()
+            self._fail_pending()
+            self._emit({"type": "DISCONNECTED"})
+            if self._closed or not self.reconnect:
+                return
+            reader = await self._reconnect()
+            if reader is None:
+                return
+
+    async def _reconnect(self) -> Optional[asyncio.StreamReader]:
+        for attempt in range(self.max_retries):
+            if self._closed:
+                return None
+            await asyncio.sleep(self.retry_delay * (2 ** min(attempt, 4)))
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                continue
+            if self._closed:
+                writer.close()
+                return None
+            self._drop_writer()
+            self._writer = writer
+            # nada de la conexión anterior puede quedar delante de las peticiones de reingreso
+            self._fail_pending()
+            for mtype, fields in self._rejoin_requests():
+                self.request(mtype, **fields)
+            self._emit({"type": "RECONNECTED", "attempt": attempt + 1})
+            return reader
+        return None
@@ -6,19 +6,26 @@ from typing import Dict, List, Optional, Tuple
 
 # --- Lógica del juego ---
 from game import (
-    create_board, clone_board, valid_columns,
-    drop_piece, check_winner, is_full,
-    print_board, ROWS, COLS, EMPTY, P1, P2
+    create_board, drop_piece, check_winner,
+    ROWS, COLS, EMPTY, P1, P2
 )
 
 HOST = "0.0.0.0"
 PORT = 65432
 
 # ========== Utilidades de envío/recepción JSON ==========
+def encode_json(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+def send_line(conn: socket.socket, data: bytes):
+    try:
+        conn.sendall(data)
+    except Exception:
+        pass
+
 def send_json(conn: socket.socket, payload: dict):
     try:
-        line = json.dumps(payload, ensure_ascii=False)
-        conn.sendall((line + "\n").encode("utf-8"))
+        send_line(conn, encode_json(payload))
     except Exception:
         pass
 
@@ -41,6 +48,14 @@ def recv_json_line(conn: socket.socket) -> Optional[dict]:
 
 # ========== Sala ==========
 class Room:
+    """
+    Estado de una sala. Además del tablero mantiene, jugada a jugada, lo que antes
+    se recalculaba en cada mensaje: altura de cada columna, máscara de columnas
+    válidas, número de jugadas (empate en O(1)) e historial para deshacer/reproducir.
+    `version` sube con cada cambio; los payloads se cachean por versión.
+    Todo se modifica con room.lock tomado.
+    """
+
     def __init__(self, name: str):
         self.name = name
         self.board = create_board()
@@ -53,14 +68,118 @@ class Room:
         self.winner: int = EMPTY
         self.vs_server = False  # IA ocupa P2
         self.order: List[str] = []  # orden de entrada de jugadores
-
+        self.heights: List[int] = [0] * COLS  # fichas en cada columna
+        self.valid_mask: int = (1 << COLS) - 1  # bit c = columna c tiene espacio
+        self.moves: int = 0
+        self.history: List[Tuple[int, int, int]] = []  # (col, fila, ficha)
+        self.version: int = 0
+        self._board_line: Optional[bytes] = None
+        self._board_line_version = -1
+        self._summary: Optional[dict] = None
+        self._summary_version = -1
+
+    # ---------- Estado derivado ----------
+    def update(self, **fields):
+        """Cambia campos de la sala (turn, started, ended, winner, vs_server) y sube la versión."""
+        for key, value in fields.items():
+            setattr(self, key, value)
+        self.version += 1
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < COLS and bool(self.valid_mask >> col & 1)
+
+    def valid_cols(self) -> List[int]:
+        return [c for c in range(COLS) if self.valid_mask >> c & 1]
+
+    def is_full(self) -> bool:
+        return self.moves == ROWS * COLS
+
+    def next_row(self, col: int) -> int:
+        """Fila donde caería una ficha en `col` (la columna debe tener espacio)."""
+        return ROWS - 1 - self.heights[col]
+
+    def play(self, col: int, mark: int) -> int:
+        """Deja caer la ficha y actualiza el estado derivado. Devuelve la fila."""
+        r = self.next_row(col)
+        self.board[r][col] = mark
+        self.heights[col] += 1
+        if self.heights[col] == ROWS:
+            self.valid_mask &= ~(1 << col)
+        self.moves += 1
+        self.history.append((col, r, mark))
+        self.version += 1
+        return r
+
+    def undo(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Deshace la última jugada. Devuelve (col, fila, ficha) o None si no hay jugadas.
+        Antes de esa jugada la partida seguía en curso y le tocaba a quien la hizo,
+        así que también se restauran turn, ended y winner.
+        """
+        if not self.history:
+            return None
+        col, r, mark = self.history.pop()
+        self.board[r][col] = EMPTY
+        self.heights[col] -= 1
+        self.valid_mask |= 1 << col
+        self.moves -= 1
+        self.update(turn=mark, ended=False, winner=EMPTY)
+        return col, r, mark
+
+    def replay(self, upto: Optional[int] = None) -> List[List[int]]:
+        """Reconstruye el tablero tras las primeras `upto` jugadas del historial."""
+        board = create_board()
+        for col, _, mark in self.history[:upto]:
+            drop_piece(board, col, mark)
+        return board
+
+    def reset(self):
+        self.board = create_board()
+        self.heights = [0] * COLS
+        self.valid_mask = (1 << COLS) - 1
+        self.moves = 0
+        self.history = []
+        self.update(started=False, ended=False, winner=EMPTY, turn=P1)
+
+    # ---------- Miembros ----------
+    def add_player(self, name: str, conn: socket.socket, mark: int):
+        self.players[name] = (conn, mark)
+        self.order.append(name)
+        self.version += 1
+
+    def add_spectator(self, name: str, conn: socket.socket):
+        self.spectators[name] = conn
+        self.version += 1
+
+    def free_mark(self) -> int:
+        return P1 if P1 not in [m for _, m in self.players.values()] else P2
+
+    def remove(self, name: str) -> Optional[str]:
+        """Saca a `name` de la sala. Devuelve "player", "spectator" o None si no estaba."""
+        if name in self.players:
+            del self.players[name]
+            if name in self.order:
+                self.order.remove(name)
+            self.version += 1
+            return "player"
+        if name in self.spectators:
+            del self.spectators[name]
+            self.version += 1
+            return "spectator"
+        return None
+
+    # ---------- Envío ----------
     def broadcast(self, payload: dict, include_players=True, include_spectators=True):
+        self.broadcast_line(encode_json(payload), include_players, include_spectators)
+
+    def broadcast_line(self, data: bytes, include_players=True, include_spectators=True):
+        """Envía una línea ya codificada: se serializa una vez por sala, no por destinatario."""
         if include_players:
             for _, (c, _) in list(self.players.items()):
-                send_json(c, payload)
+                send_line(c, data)
         if include_spectators:
             for _, c in list(self.spectators.items()):
-                send_json(c, payload)
+                send_line(c, data)
 
     def board_payload(self) -> dict:
         return {
@@ -72,9 +191,35 @@ class Room:
             "room": self.name,
             "started": self.started,
             "ended": self.ended,
-            "winner": self.winner
+            "winner": self.winner,
+            "version": self.version
         }
 
+    def board_line(self) -> bytes:
+        """BOARD ya serializado; solo se vuelve a construir si cambió la versión."""
+        if self._board_line_version != self.version:
+            self._board_line = encode_json(self.board_payload())
+            self._board_line_version = self.version
+        return self._board_line
+
+    def broadcast_board(self):
+        self.broadcast_line(self.board_line())
+
+    def summary(self) -> dict:
+        """Entrada de la sala para LIST, cacheada por versión. Llamar con room.lock tomado."""
+        version = self.version  # se lee antes de construir: nunca cachear datos viejos con versión nueva
+        if self._summary_version != version:
+            self._summary = {
+                "room": self.name,
+                "players": list(self.players.keys()),
+                "spectators": list(self.spectators.keys()),
+                "started": self.started,
+                "ended": self.ended,
+                "vs_server": self.vs_server
+            }
+            self._summary_version = version
+        return self._summary
+
 # ========== Servidor principal ==========
 class Connect4Server:
     def __init__(self, host: str, port: int):
@@ -93,21 +238,19 @@ class Connect4Server:
         4) Aleatorio de válidas como último recurso.
         """
         board = room.board
-        valids = valid_columns(board)
+        valids = room.valid_cols()
         if not valids:
             return random.choice(range(COLS))
 
-        for c in valids:
-            b2 = clone_board(board)
-            r = drop_piece(b2, c, P2)
-            if r is not None and check_winner(b2, r, c) == P2:
-                return c
-
-        for c in valids:
-            b2 = clone_board(board)
-            r = drop_piece(b2, c, P1)
-            if r is not None and check_winner(b2, r, c) == P1:
-                return c
+        # se prueba la ficha en el tablero real y se quita: sin copiar el tablero
+        for mark in (P2, P1):
+            for c in valids:
+                r = room.next_row(c)
+                board[r][c] = mark
+                win = check_winner(board, r, c)
+                board[r][c] = EMPTY
+                if win == mark:
+                    return c
 
         prefs = sorted(valids, key=lambda x: abs(x - COLS//2))
         if prefs:
@@ -160,15 +303,9 @@ class Connect4Server:
 
                 if mtype == "LIST":
                     rooms_desc = []
-                    for rn, r in self.rooms.items():
-                        rooms_desc.append({
-                            "room": rn,
-                            "players": list(r.players.keys()),
-                            "spectators": list(r.spectators.keys()),
-                            "started": r.started,
-                            "ended": r.ended,
-                            "vs_server": r.vs_server
-                        })
+                    for r in list(self.rooms.values()):
+                        with r.lock:
+                            rooms_desc.append(r.summary())
                     send_json(conn, {"type": "ROOMS", "rooms": rooms_desc})
                     continue
 
@@ -185,13 +322,12 @@ class Connect4Server:
                         if len(room.players) >= 2:
                             send_json(conn, {"type": "ERROR", "error": "Sala ya tiene 2 jugadores"})
                             continue
-                        mark = P1 if P1 not in [m for _, m in room.players.values()] else P2
-                        room.players[username] = (conn, mark)
-                        room.order.append(username)
+                        mark = room.free_mark()
+                        room.add_player(username, conn, mark)
                         current_room = room
                         send_json(conn, {"type": "JOINED", "room": rn, "mark": mark})
                         room.broadcast({"type": "INFO", "msg": f"{username} se unió como jugador."})
-                        room.broadcast(room.board_payload())
+                        room.broadcast_board()
                     continue
 
                 if mtype == "JOIN":
@@ -207,13 +343,12 @@ class Connect4Server:
                         if len(room.players) >= 2 or room.vs_server and len(room.players) >= 1:
                             send_json(conn, {"type": "ERROR", "error": "No hay cupo de jugador"})
                             continue
-                        mark = P1 if P1 not in [m for _, m in room.players.values()] else P2
-                        room.players[username] = (conn, mark)
-                        room.order.append(username)
+                        mark = room.free_mark()
+                        room.add_player(username, conn, mark)
                         current_room = room
                         send_json(conn, {"type": "JOINED", "room": rn, "mark": mark})
                         room.broadcast({"type": "INFO", "msg": f"{username} se unió como jugador."})
-                        room.broadcast(room.board_payload())
+                        room.broadcast_board()
                     continue
 
 
@@ -227,11 +362,11 @@ class Connect4Server:
                         if username in room.players or username in room.spectators:
                             send_json(conn, {"type": "ERROR", "error": "Ya estás en esa sala"})
                             continue
-                        room.spectators[username] = conn
+                        room.add_spectator(username, conn)
                         current_room = room
                         send_json(conn, {"type": "SPECTATE_OK", "room": rn})
                         room.broadcast({"type": "INFO", "msg": f"{username} está como espectador."})
-                        send_json(conn, room.board_payload())
+                        send_line(conn, room.board_line())
                     continue
 
                 # ---- START (cuando haya 2 jugadores) ----
@@ -252,11 +387,11 @@ class Connect4Server:
                             if len(room.players) < 2:
                                 send_json(conn, {"type": "ERROR", "error": "Se requieren 2 jugadores"})
                                 continue
-                        room.started = True
-                        room.turn = P1
-                        room.broadcast({"type": "STARTED", "room": room.name, "turn": room.turn})
-                        room.broadcast(room.board_payload())
-                        self.maybe_ai_move(room)
+                        room.update(started=True, turn=P1)
+                        room.broadcast({"type": "STARTED", "room": room.name, "turn": room.turn, "by": username})
+                        room.broadcast_board()
+                    # fuera del lock: maybe_ai_move lo toma de nuevo
+                    self.maybe_ai_move(room)
                     continue
 
                 if mtype == "START_VS_SERVER":
@@ -274,15 +409,11 @@ class Connect4Server:
                             continue
                         # unir a este usuario como jugador
                         if username not in room.players:
-                            mark = P1
-                            room.players[username] = (conn, mark)
-                            room.order.append(username)
-                        room.vs_server = True
-                        room.started = True
-                        room.turn = P1
-                        room.broadcast({"type": "STARTED", "room": room.name, "turn": room.turn, "vs_server": True})
-                        room.broadcast(room.board_payload())
-                        self.maybe_ai_move(room)
+                            room.add_player(username, conn, P1)
+                        room.update(vs_server=True, started=True, turn=P1)
+                        room.broadcast({"type": "STARTED", "room": room.name, "turn": room.turn, "vs_server": True, "by": username})
+                        room.broadcast_board()
+                    self.maybe_ai_move(room)
                     current_room = room
                     continue
 
@@ -292,13 +423,9 @@ class Connect4Server:
                         continue
                     room = current_room
                     with room.lock:
-                        room.board = create_board()
-                        room.started = False
-                        room.ended = False
-                        room.winner = EMPTY
-                        room.turn = P1
+                        room.reset()
                         room.broadcast({"type": "RESET_OK", "by": username})
-                        room.broadcast(room.board_payload())
+                        room.broadcast_board()
                     continue
 
                 # ---- MOVE (jugada) ----
@@ -326,33 +453,30 @@ class Connect4Server:
                         except (TypeError, ValueError):
                             send_json(conn, {"type": "ERROR", "error": "Columna inválida"})
                             continue
-                        if col not in range(COLS) or col not in valid_columns(room.board):
+                        if not room.can_play(col):
                             send_json(conn, {"type": "ERROR", "error": "Movimiento no válido"})
                             continue
 
                         # realizar movimiento
-                        r = drop_piece(room.board, col, my_mark)
-                        assert r is not None
+                        r = room.play(col, my_mark)
                         win = check_winner(room.board, r, col)
                         if win != EMPTY:
-                            room.ended = True
-                            room.winner = win
+                            room.update(ended=True, winner=win)
                             room.broadcast({"type": "MOVE_OK", "by": username, "col": col})
-                            room.broadcast(room.board_payload())
+                            room.broadcast_board()
                             room.broadcast({"type": "GAME_OVER", "winner": win, "by": username})
                             continue
 
-                        if is_full(room.board):
-                            room.ended = True
-                            room.winner = EMPTY
+                        if room.is_full():
+                            room.update(ended=True, winner=EMPTY)
                             room.broadcast({"type": "MOVE_OK", "by": username, "col": col})
-                            room.broadcast(room.board_payload())
+                            room.broadcast_board()
                             room.broadcast({"type": "GAME_OVER", "winner": 0})
                             continue
 
-                        room.turn = P1 if room.turn == P2 else P2
+                        room.update(turn=P1 if room.turn == P2 else P2)
                         room.broadcast({"type": "MOVE_OK", "by": username, "col": col, "next": room.turn})
-                        room.broadcast(room.board_payload())
+                        room.broadcast_board()
 
                     self.maybe_ai_move(room)
                     continue
@@ -370,15 +494,15 @@ class Connect4Server:
                 if conn in self.clients:
                     username = self.clients.pop(conn)
             if username:
-                for r in self.rooms.values():
+                for r in list(self.rooms.values()):
                     with r.lock:
-                        if username in r.players:
-                            del r.players[username]
+                        role = r.remove(username)
+                        if role == "player":
                             r.broadcast({"type": "INFO", "msg": f"{username} salió."})
-                        if username in r.spectators:
-                            del r.spectators[username]
+                        elif role == "spectator":
                             r.broadcast({"type": "INFO", "msg": f"{username} dejó de espectar."})
-                        r.broadcast(r.board_payload())
+                        if role is not None:
+                            r.broadcast_board()
             try:
                 conn.close()
             except Exception:
@@ -396,38 +520,34 @@ class Connect4Server:
             if room.turn != P2:
                 return
             col = self.ai_choose_column(room)
-            r = drop_piece(room.board, col, P2)
-            if r is None:
+            if not room.can_play(col):
                 # si por alguna razón no pudo (col llena), intentar otra
-                valids = valid_columns(room.board)
+                valids = room.valid_cols()
                 if not valids:
-                    room.ended = True
-                    room.winner = EMPTY
+                    room.update(ended=True, winner=EMPTY)
                     room.broadcast({"type": "GAME_OVER", "winner": 0})
                     return
                 col = random.choice(valids)
-                r = drop_piece(room.board, col, P2)
+            r = room.play(col, P2)
 
             win = check_winner(room.board, r, col)
             if win != EMPTY:
-                room.ended = True
-                room.winner = win
+                room.update(ended=True, winner=win)
                 room.broadcast({"type": "MOVE_OK", "by": "SERVER_AI", "col": col})
-                room.broadcast(room.board_payload())
+                room.broadcast_board()
                 room.broadcast({"type": "GAME_OVER", "winner": win, "by": "SERVER_AI"})
                 return
 
-            if is_full(room.board):
-                room.ended = True
-                room.winner = EMPTY
+            if room.is_full():
+                room.update(ended=True, winner=EMPTY)
                 room.broadcast({"type": "MOVE_OK", "by": "SERVER_AI", "col": col})
-                room.broadcast(room.board_payload())
+                room.broadcast_board()
                 room.broadcast({"type": "GAME_OVER", "winner": 0})
                 return
 
-            room.turn = P1
+            room.update(turn=P1)
             room.broadcast({"type": "MOVE_OK", "by": "SERVER_AI", "col": col, "next": room.turn})
-            room.broadcast(room.board_payload())
+            room.broadcast_board()
 
     # ---------- Aceptador ----------
     def serve_forever(self):
@@ -0,0 +1,87 @@
+#Pruebas de invariantes: el estado derivado de Room debe coincidir con las funciones de game.py
+import random
+import unittest
+
+from game import (
+    create_board, clone_board, valid_columns, drop_piece,
+    check_winner, is_full, ROWS, COLS, EMPTY, P1, P2
+)
+from server import Room
+
+GAMES = 300
+
+class RoomInvariantTest(unittest.TestCase):
+    def assert_consistent(self, room: Room):
+        board = room.board
+        self.assertEqual(room.valid_cols(), valid_columns(board))
+        self.assertEqual(room.valid_mask, sum(1 << c for c in valid_columns(board)))
+        self.assertEqual(room.is_full(), is_full(board))
+        self.assertEqual(room.moves, sum(cell != EMPTY for row in board for cell in row))
+        self.assertEqual(room.moves, len(room.history))
+        for c in range(COLS):
+            self.assertEqual(room.heights[c], sum(board[r][c] != EMPTY for r in range(ROWS)))
+        self.assertEqual(room.replay(), board)
+
+    def test_random_games(self):
+        rng = random.Random(1234)
+        for _ in range(GAMES):
+            room = Room("t")
+            room.update(started=True, turn=P1)
+            while not room.ended and not room.is_full():
+                self.assert_consistent(room)
+                col = rng.choice(room.valid_cols())
+                mark = room.turn
+                before = clone_board(room.board)
+                version = room.version
+
+                r = room.play(col, mark)
+                expected = clone_board(before)
+                self.assertEqual(drop_piece(expected, col, mark), r)
+                self.assertEqual(room.board, expected)
+                self.assertGreater(room.version, version)
+                self.assert_consistent(room)
+
+                if rng.random() < 0.2:
+                    self.assertEqual(room.undo(), (col, r, mark))
+                    self.assertEqual(room.board, before)
+                    self.assertEqual(room.turn, mark)
+                    self.assert_consistent(room)
+                    r = room.play(col, mark)
+
+                win = check_winner(room.board, r, col)
+                if win != EMPTY:
+                    room.update(ended=True, winner=win)
+                elif room.is_full():
+                    room.update(ended=True, winner=EMPTY)
+                else:
+                    room.update(turn=P2 if mark == P1 else P1)
+            self.assert_consistent(room)
+
+            room.reset()
+            self.assertEqual(room.board, create_board())
+            self.assertFalse(room.started or room.ended)
+            self.assert_consistent(room)
+
+    def test_undo_winning_move_restores_game_state(self):
+        room = Room("t")
+        room.update(started=True, turn=P1)
+        for col in (0, 1, 0, 1, 0, 1):
+            room.play(col, room.turn)
+            room.update(turn=P2 if room.turn == P1 else P1)
+        r = room.play(0, P1)
+        self.assertEqual(check_winner(room.board, r, 0), P1)
+        room.update(ended=True, winner=P1)
+
+        self.assertEqual(room.undo(), (0, r, P1))
+        self.assertFalse(room.ended)
+        self.assertEqual(room.winner, EMPTY)
+        self.assertEqual(room.turn, P1)
+        self.assert_consistent(room)
+
+    def test_undo_empty_history(self):
+        room = Room("t")
+        self.assertIsNone(room.undo())
+        self.assert_consistent(room)
+
+if __name__ == "__main__":
+    unittest.main()